@@ -3,17 +3,23 @@ Hospital LOS Prediction Flask API
 Handles feature engineering from 13 input columns to 312 encoded features
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request
 from flask import render_template, send_from_directory
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 import joblib
+import orjson
 import logging
 from datetime import datetime
 import traceback
 import xgboost 
 import os 
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
 
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.compose import ColumnTransformer
@@ -41,6 +47,19 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def ojsonify(obj):
+    """
+    JSON response serialized with orjson, a drop-in for flask.jsonify
+    
+    orjson is much faster than the stdlib json module Flask uses and
+    serializes numpy scalars and arrays directly.
+    """
+    return app.response_class(
+        orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY),
+        mimetype='application/json'
+    )
+
+
 
 # Get absolute path to project directory
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -51,28 +70,43 @@ PKL_DIR = os.path.join(BASE_DIR, 'assets', 'pkl_files')
 # LOAD MODEL AND PREPROCESSORS
 # ============================================
 
+def load_pickle(filename):
+    """Load a joblib pickle from PKL_DIR"""
+    return joblib.load(os.path.join(PKL_DIR, filename))
+
+
 try:
     # Load your trained model
-    model = joblib.load(os.path.join(PKL_DIR, 'xgb_modelv1.pkl'))
+    model = load_pickle('xgb_modelv1.pkl')
     logger.info("✓ Model loaded successfully")
 
-    xgb_hospital_pipeline = joblib.load(os.path.join(PKL_DIR, 'xgb_hospital_full_pipeline.pkl'))
+    xgb_hospital_pipeline = load_pickle('xgb_hospital_full_pipeline.pkl')
     logger.info("✓ Model-cleaner pipeline loaded successfully")
+
+    # The pipeline's trained booster, used for inference directly so requests
+    # skip the sklearn pipeline
+    booster = xgb_hospital_pipeline.named_steps['xgb_model'].get_booster()
+    logger.info(f"✓ Booster extracted: {booster.num_features()} features")
     
     # Load column names and order
-    column_names = joblib.load(os.path.join(PKL_DIR, 'feature_names.pkl'))
+    column_names = load_pickle('feature_names.pkl')
     logger.info(f"✓ Column names loaded: {len(column_names)} columns expected")
+    COLUMN_INDEX = {col: i for i, col in enumerate(column_names)}
     
     # Load mapping files
-    mdc_mapping = joblib.load(os.path.join(PKL_DIR, 'mdc_mapping.pkl'))
+    mdc_mapping = load_pickle('mdc_mapping.pkl')
     logger.info(f"✓ MDC mapping loaded: {len(mdc_mapping)} mappings")
     
-    severity_mapping = joblib.load(os.path.join(PKL_DIR, 'severity_mapping.pkl'))
+    severity_mapping = load_pickle('severity_mapping.pkl')
     logger.info(f"✓ Severity mapping loaded: {len(severity_mapping)} mappings")
 
-    mdc_conversion_mapping = joblib.load(os.path.join(PKL_DIR, 'mdc_conversion_mapping.pkl'))
+    mdc_conversion_mapping = load_pickle('mdc_conversion_mapping.pkl')
     logger.info(f"✓ mdc conversion mapping  loaded: {len(mdc_conversion_mapping)} mappings")
 
+    # Plain dicts for per-request scalar lookups
+    MDC_TO_LOS = dict(mdc_mapping)
+    SEVERITY_TO_LOS = dict(severity_mapping)
+
     # cleaning_pipeline = joblib.load(os.path.join(PKL_DIR, 'hospital_data_cleanerv1.pkl'))
     # logger.info(f"✓ Cleaning pipeline  loaded ")
     
@@ -87,14 +121,48 @@ except FileNotFoundError as e:
     logger.error("  - severity_mapping.pkl")
     MODEL_LOADED = False
     model = None
+    xgb_hospital_pipeline = None
+    booster = None
     column_names = None
+    COLUMN_INDEX = {}
     mdc_mapping = None
     severity_mapping = None
+    mdc_conversion_mapping = None
+    MDC_TO_LOS = None
+    SEVERITY_TO_LOS = None
 
 # ============================================
 # FEATURE ENGINEERING FUNCTIONS
 # ============================================
 
+# Input columns in the order the model pipeline expects them
+INPUT_COLUMNS = [
+    'Hospital County',
+    'Facility Name',
+    'Age Group',
+    'Gender',
+    'Race',
+    'Ethnicity',
+    'Type of Admission',
+    'Patient Disposition',
+    'APR MDC Code',
+    'APR MDC Description',
+    'APR Severity of Illness Code',
+    'APR Medical Surgical Description',
+    'Payment Typology 1',
+    'Emergency Department Indicator'
+]
+INT_INPUT_COLUMNS = ['APR MDC Code', 'APR Severity of Illness Code']
+MDC_CODE_POSITION = INPUT_COLUMNS.index('APR MDC Code')
+
+# Single-row template holding the default of every column. Copying it is much
+# cheaper than building a DataFrame from a dict per request. Every column is
+# object dtype so payload values are stored as sent (e.g. severity "3"), as the
+# dict-built frame did; an int64 column would reject them on newer pandas.
+_TEMPLATE_DF = pd.DataFrame({
+    col: pd.Series([0 if col in INT_INPUT_COLUMNS else ''], dtype=object)
+    for col in INPUT_COLUMNS
+})
 
 
 def prepare_input_dataframe(data):
@@ -112,33 +180,124 @@ def prepare_input_dataframe(data):
     mdc_key = data.get('APR MDC Description', '')
     ## using the MDC Description as the key to get the MDC Code
     mdc_value = mdc_code_mapping[mdc_key]
-    logger.info(f"This is the APR MDC Code: {mdc_value} while this is the APR MDC Description: {mdc_key}")
-    # Extract the 13 input features in correct order
-    input_data = {
-        'Hospital County': data.get('Hospital County', ''),
-        'Facility Name': data.get('Facility Name', ''),
-        'Age Group': data.get('Age Group', ''),
-        'Gender': data.get('Gender', ''),
-        'Race': data.get('Race', ''),
-        'Ethnicity': data.get('Ethnicity', ''),
-        'Type of Admission': data.get('Type of Admission', ''),
-        'Patient Disposition': data.get('Patient Disposition', ''),
-        'APR MDC Code': mdc_value,
-        'APR MDC Description': data.get('APR MDC Description', ''),
-        'APR Severity of Illness Code': data.get('APR Severity of Illness Code', 0),
-        'APR Medical Surgical Description': data.get('APR Medical Surgical Description', ''),
-        'Payment Typology 1': data.get('Payment Typology 1', ''),
-        'Emergency Department Indicator': data.get('Emergency Department Indicator', '')
-    }
-    
-    # Create DataFrame
-    df = pd.DataFrame([input_data])
+    logger.debug("This is the APR MDC Code: %s while this is the APR MDC Description: %s", mdc_value, mdc_key)
+
+    # Fill the template in place; columns missing from the payload keep their default
+    df = _TEMPLATE_DF.copy()
+    for i, col in enumerate(INPUT_COLUMNS):
+        if i != MDC_CODE_POSITION and col in data:
+            df.iat[0, i] = data[col]
+    df.iat[0, MDC_CODE_POSITION] = mdc_value
     
-    logger.info(f"Created input DataFrame with shape: {df.shape}")
-    logger.info(f"Input columns: {df.columns.tolist()}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Created input DataFrame with shape: %s", df.shape)
+        logger.debug("Input columns: %r", df.columns.tolist())
     
     return df
 
+# Categorical columns one-hot encoded as "<column>_<value>" in column_names
+CATEGORICAL_COLUMNS = [
+    'Hospital County',
+    'Facility Name',
+    'Age Group',
+    'Gender',
+    'Race',
+    'Ethnicity',
+    'Type of Admission',
+    'Patient Disposition',
+    'APR Medical Surgical Description',
+    'Payment Typology 1',
+    'Emergency Department Indicator'
+]
+
+# Numeric columns passed through as-is when present in column_names
+NUMERIC_COLUMNS = ['APR MDC Code', 'APR Severity of Illness Code', 'LOS_per_MDC', 'LOS_per_severity']
+
+# (column, value) -> position of its one-hot column, built once at startup so
+# encoding a request is a handful of dict lookups
+ONEHOT_INDEX = {
+    (col, name[len(col) + 1:]): i
+    for name, i in COLUMN_INDEX.items()
+    for col in CATEGORICAL_COLUMNS
+    if name.startswith(col + '_')
+}
+
+
+# Same index maps for the booster, laid out like the output of the pipeline
+# cleaner's ColumnTransformer ("cat__<column>_<value>" then "num__<column>").
+# Built from the fitted categories rather than by parsing names, so only real
+# string categories get a position (the encoder's NaN category stays zero).
+if xgb_hospital_pipeline is not None:
+    _cleaner = xgb_hospital_pipeline.named_steps['cleaner']
+    _positions = {name: i for i, name in enumerate(_cleaner.encoder.get_feature_names_out())}
+    PIPELINE_NUM_FEATURES = len(_positions)
+    if booster.num_features() != PIPELINE_NUM_FEATURES:
+        raise RuntimeError(
+            f"Booster expects {booster.num_features()} features but the pipeline "
+            f"cleaner produces {PIPELINE_NUM_FEATURES}"
+        )
+    # One (column, {value: position}) pair per categorical column: a lookup
+    # keyed by the plain value avoids building a (column, value) tuple per field
+    PIPELINE_ONEHOT_LOOKUPS = [
+        (col, {
+            value: _positions[f"cat__{col}_{value}"]
+            for value in categories
+            if isinstance(value, str)
+        })
+        for col, categories in zip(
+            _cleaner.cat_cols,
+            _cleaner.encoder.named_transformers_['cat'].categories_
+        )
+    ]
+    PIPELINE_NUMERIC_INDEX = {col: _positions[f"num__{col}"] for col in _cleaner.num_cols}
+    # Target encodings the cleaner learned, with its fallback for unseen codes
+    PIPELINE_MDC_TO_LOS = dict(_cleaner.mdc_mapping)
+    PIPELINE_MDC_LOS_DEFAULT = float(_cleaner.mdc_mapping.median())
+    PIPELINE_SEVERITY_TO_LOS = dict(_cleaner.severity_mapping)
+    PIPELINE_SEVERITY_LOS_DEFAULT = float(_cleaner.severity_mapping.median())
+    PIPELINE_MDC_CODE_POSITION = PIPELINE_NUMERIC_INDEX['APR MDC Code']
+    PIPELINE_SEVERITY_POSITION = PIPELINE_NUMERIC_INDEX['APR Severity of Illness Code']
+    PIPELINE_LOS_PER_MDC_POSITION = PIPELINE_NUMERIC_INDEX['LOS_per_MDC']
+    PIPELINE_LOS_PER_SEVERITY_POSITION = PIPELINE_NUMERIC_INDEX['LOS_per_severity']
+
+# Per-thread feature buffer reused by encode_model_input
+_row_buffers = threading.local()
+
+
+def encode_model_input(data):
+    """
+    Encode a frontend payload straight into the booster's feature vector
+    
+    Mirrors xgb_hospital_pipeline's cleaner (target encoding, one-hot
+    encoding, passthrough numerics) without building any DataFrame.
+    
+    Args:
+        data: Dict from frontend with dataset column names
+    
+    Returns:
+        float32 numpy array of shape (n_features,). This is the calling
+        thread's reusable buffer, overwritten by its next call.
+    """
+    row = getattr(_row_buffers, 'row', None)
+    if row is None:
+        row = _row_buffers.row = np.zeros(PIPELINE_NUM_FEATURES, dtype=np.float32)
+    else:
+        row.fill(0)
+
+    mdc_code = mdc_code_mapping[data.get('APR MDC Description', '')]
+    severity = data.get('APR Severity of Illness Code', 0)
+    row[PIPELINE_MDC_CODE_POSITION] = mdc_code
+    row[PIPELINE_SEVERITY_POSITION] = severity
+    row[PIPELINE_LOS_PER_MDC_POSITION] = PIPELINE_MDC_TO_LOS.get(mdc_code, PIPELINE_MDC_LOS_DEFAULT)
+    row[PIPELINE_LOS_PER_SEVERITY_POSITION] = PIPELINE_SEVERITY_TO_LOS.get(severity, PIPELINE_SEVERITY_LOS_DEFAULT)
+
+    for col, positions in PIPELINE_ONEHOT_LOOKUPS:
+        idx = positions.get(data.get(col, ''))
+        if idx is not None:
+            row[idx] = 1.0
+    return row
+
+
 def encode_features(df):
     """
     Transform 13 input columns into 312 encoded features
@@ -154,73 +313,38 @@ def encode_features(df):
         DataFrame with 312 encoded columns matching column_names.pkl
     """
     
-    logger.info("Starting feature encoding...")
-    logger.info(f"{df.columns}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Starting feature encoding...")
+        logger.debug("Input columns: %r", df.columns.tolist())
+
+    record = df.to_dict('records')[0]
     
     # Apply MDC mapping if needed
-    # if 'APR MDC Code' in df.columns and mdc_conversion_mapping:
-    if 'APR MDC Code' in df.columns and mdc_conversion_mapping is not None:
-        mdc_conversion_mapping1 = mdc_conversion_mapping.set_index("APR MDC Description")["APR MDC Code"].to_dict()
-        df['APR MDC Code'] = df['APR MDC Description'].map(mdc_conversion_mapping1)
-        logger.info(f"Mapped MDC Description to Code: {df['APR MDC Code'].iloc[0]}")
-
-    if 'APR MDC Code' in df.columns and mdc_conversion_mapping is not None:
-        df["LOS_per_MDC"] = df["APR MDC Code"].map(mdc_mapping)
-        logger.info(f"Mapped feature Engineering LOS_per_MDC")
+    # (APR MDC Code was already mapped from its description in prepare_input_dataframe)
+    if MDC_TO_LOS is not None:
+        record['LOS_per_MDC'] = MDC_TO_LOS.get(record['APR MDC Code'], np.nan)
+        logger.debug("Mapped feature Engineering LOS_per_MDC")
     
     # Apply severity mapping if needed
-    if 'APR Severity of Illness Code' in df.columns and severity_mapping is not None:
-        # If your severity_mapping transforms the codes
-        df["LOS_per_severity"] = df["APR Severity of Illness Code"].map(severity_mapping)
-        logger.info(f"Mapped feature Engineering LOS_per_severity")
-
-        logger.info(f" After feature engineering: {df.columns }")
-    
-    # Get categorical columns (exclude numeric ones)
-    categorical_columns = [
-        'Hospital County',
-        'Facility Name',
-        'Age Group',
-        'Gender',
-        'Race',
-        'Ethnicity',
-        'Type of Admission',
-        'Patient Disposition',
-        'APR MDC Description',
-        'APR Medical Surgical Description',
-        'Payment Typology 1',
-        'Emergency Department Indicator'
-    ]
-    
-
-    logger.info(f"{'+'*5} Dropping irrelevant columns (with respect to my prediction app)  {'+' * 5} ")
-    # please modify the drop_list as much as needed 
-
-    df_drop_irrelevant = df.drop(columns = ['APR MDC Description']).copy()
-
-    # One-hot encode categorical variables
-    # This should match your training preprocessing
-
-    df_encoded = pd.get_dummies(df_drop_irrelevant).copy()
-    
-    logger.info(f"After encoding: {df_encoded.shape[1]} columns")
-    logger.info(f"feature names after encoding :{df_encoded.columns}")
-    
-    # Align with training columns (312 columns)
-    # Add missing columns with 0s
-    missing_cols = set(column_names) - set(df_encoded.columns)
-    for col in missing_cols:
-        df_encoded[col] = 0
-    
-    # Remove extra columns not in training
-    extra_cols = set(df_encoded.columns) - set(column_names)
-    df_encoded = df_encoded.drop(columns=extra_cols)
-    
-    # Reorder columns to match training order
-    df_encoded = df_encoded[column_names]
-    
-    logger.info(f"Final encoded shape: {df_encoded.shape}")
-    logger.info(f"Matches expected columns: {df_encoded.shape[1] == len(column_names)}")
+    if SEVERITY_TO_LOS is not None:
+        record['LOS_per_severity'] = SEVERITY_TO_LOS.get(record['APR Severity of Illness Code'], np.nan)
+        logger.debug("Mapped feature Engineering LOS_per_severity")
+
+    # Scatter the input into a zero vector laid out like column_names.
+    # Categories unseen in training have no position and stay all-zero.
+    row = np.zeros(len(column_names), dtype=np.float32)
+    for col in NUMERIC_COLUMNS:
+        idx = COLUMN_INDEX.get(col)
+        if idx is not None:
+            row[idx] = record[col]
+    for col in CATEGORICAL_COLUMNS:
+        idx = ONEHOT_INDEX.get((col, record.get(col)))
+        if idx is not None:
+            row[idx] = 1.0
+
+    df_encoded = pd.DataFrame(row.reshape(1, -1), columns=column_names)
+    
+    logger.debug("Final encoded shape: %s", df_encoded.shape)
     
     return df_encoded
 
@@ -229,6 +353,124 @@ def encode_features(df):
 # RISK FACTOR IDENTIFICATION
 # ============================================
 
+def _risk_factor(factor, description, impact, impact_days):
+    return {
+        'factor': factor,
+        'description': description,
+        'impact': impact,
+        'impact_days': impact_days
+    }
+
+
+HIGH_LOS_DIAGNOSES = {
+    'Multiple Significant Trauma': ('high', '+4-7 days'),
+    'Burns': ('high', '+5-10 days'),
+    'Mental Diseases and Disorders': ('medium', '+2-4 days'),
+    'Newborns and Other Neonates with Conditions Originating in the Perinatal Period': ('medium', '+3-5 days'),
+    'Diseases and Disorders of the Circulatory System': ('medium', '+1-3 days'),
+    'Diseases and Disorders of the Respiratory System': ('medium', '+1-2 days')
+}
+
+# (input field, {field value: risk factor}) checked in this order.
+# The factor dicts are built once and shared between responses: never mutate them.
+RISK_FACTOR_RULES = [
+    # Age-based factors
+    ('Age Group', {
+        '70+': _risk_factor(
+            'Advanced Age',
+            'Patients 70+ typically require longer recovery periods',
+            'medium', '+1-2 days'
+        ),
+        '50-69': _risk_factor(
+            'Older Adult',
+            'Age may contribute to extended recovery time',
+            'low', '+0.5-1 day'
+        )
+    }),
+    # Admission type factors
+    ('Type of Admission', {
+        'Emergency': _risk_factor(
+            'Emergency Admission',
+            'Unplanned admissions often involve more complex conditions',
+            'medium', '+1-3 days'
+        ),
+        'Trauma': _risk_factor(
+            'Trauma Case',
+            'Traumatic injuries typically require intensive care',
+            'high', '+3-5 days'
+        )
+    }),
+    # Surgical vs Medical
+    ('APR Medical Surgical Description', {
+        'Surgical': _risk_factor(
+            'Surgical Procedure',
+            'Post-operative care and recovery time needed',
+            'medium', '+2-3 days'
+        )
+    }),
+    # Emergency Department indicator
+    ('Emergency Department Indicator', {
+        'Y': _risk_factor(
+            'Emergency Department Admission',
+            'Initial ED evaluation may indicate urgent condition',
+            'low', '+0.5-1 day'
+        )
+    }),
+    # Diagnosis-specific factors
+    ('APR MDC Description', {
+        diagnosis: _risk_factor(
+            'Complex Diagnosis',
+            f'{diagnosis.split(" and ")[0]} typically requires extended care',
+            impact, days
+        )
+        for diagnosis, (impact, days) in HIGH_LOS_DIAGNOSES.items()
+    }),
+    # Insurance/Payment factors (social determinant)
+    ('Payment Typology 1', {
+        **{
+            payment: _risk_factor(
+                'Insurance Coverage',
+                'Insurance status may affect discharge planning',
+                'low', '+0.5-1 day'
+            )
+            for payment in ('Self-Pay', 'Unknown')
+        },
+        'Medicaid': _risk_factor(
+            'Medicaid Coverage',
+            'May require additional discharge planning resources',
+            'low', '+0.5 day'
+        )
+    }),
+    # Patient disposition planning
+    ('Patient Disposition', {
+        disposition: _risk_factor(
+            'Post-Acute Care Planning',
+            f'Discharge to {disposition} requires coordination',
+            'medium', '+1-2 days'
+        )
+        for disposition in ('Skilled Nursing Home', 'Inpatient Rehabilitation Facility')
+    })
+]
+
+
+def _high_severity_factor(severity):
+    return _risk_factor(
+        'High Clinical Severity',
+        f'Severity level {severity} indicates complex medical needs',
+        'high', '+2-4 days'
+    )
+
+
+# Prebuilt for the valid high severity codes; any other level >= 3 is built on demand
+HIGH_SEVERITY_RISK_FACTORS = {severity: _high_severity_factor(severity) for severity in (3, 4)}
+
+ROUTINE_RISK_FACTOR = _risk_factor(
+    'Routine Admission',
+    'No major clinical complexity indicators identified',
+    'none', 'Standard LOS expected'
+)
+
+
 def identify_risk_factors(input_data, predicted_los):
     """
     Identify clinical factors contributing to predicted LOS
@@ -236,128 +478,182 @@ def identify_risk_factors(input_data, predicted_los):
     """
     
     factors = []
-    
+
     # Severity-based factors
     severity = input_data.get('APR Severity of Illness Code', 0)
     if severity >= 3:
-        factors.append({
-            'factor': 'High Clinical Severity',
-            'description': f'Severity level {severity} indicates complex medical needs',
-            'impact': 'high',
-            'impact_days': '+2-4 days'
-        })
-    
-    # Age-based factors
-    age_group = input_data.get('Age Group', '')
-    if age_group == '70+':
-        factors.append({
-            'factor': 'Advanced Age',
-            'description': 'Patients 70+ typically require longer recovery periods',
-            'impact': 'medium',
-            'impact_days': '+1-2 days'
-        })
-    elif age_group == '50-69':
-        factors.append({
-            'factor': 'Older Adult',
-            'description': 'Age may contribute to extended recovery time',
-            'impact': 'low',
-            'impact_days': '+0.5-1 day'
-        })
-    
-    # Admission type factors
-    admission_type = input_data.get('Type of Admission', '')
-    if admission_type == 'Emergency':
-        factors.append({
-            'factor': 'Emergency Admission',
-            'description': 'Unplanned admissions often involve more complex conditions',
-            'impact': 'medium',
-            'impact_days': '+1-3 days'
-        })
-    elif admission_type == 'Trauma':
-        factors.append({
-            'factor': 'Trauma Case',
-            'description': 'Traumatic injuries typically require intensive care',
-            'impact': 'high',
-            'impact_days': '+3-5 days'
-        })
-    
-    # Surgical vs Medical
-    med_surg = input_data.get('APR Medical Surgical Description', '')
-    if med_surg == 'Surgical':
-        factors.append({
-            'factor': 'Surgical Procedure',
-            'description': 'Post-operative care and recovery time needed',
-            'impact': 'medium',
-            'impact_days': '+2-3 days'
-        })
-    
-    # Emergency Department indicator
-    if input_data.get('Emergency Department Indicator') == 'Y':
-        factors.append({
-            'factor': 'Emergency Department Admission',
-            'description': 'Initial ED evaluation may indicate urgent condition',
-            'impact': 'low',
-            'impact_days': '+0.5-1 day'
-        })
-    
-    # Diagnosis-specific factors
-    diagnosis = input_data.get('APR MDC Description', '')
-    high_los_diagnoses = {
-        'Multiple Significant Trauma': ('high', '+4-7 days'),
-        'Burns': ('high', '+5-10 days'),
-        'Mental Diseases and Disorders': ('medium', '+2-4 days'),
-        'Newborns and Other Neonates with Conditions Originating in the Perinatal Period': ('medium', '+3-5 days'),
-        'Diseases and Disorders of the Circulatory System': ('medium', '+1-3 days'),
-        'Diseases and Disorders of the Respiratory System': ('medium', '+1-2 days')
-    }
-    
-    if diagnosis in high_los_diagnoses:
-        impact, days = high_los_diagnoses[diagnosis]
-        factors.append({
-            'factor': 'Complex Diagnosis',
-            'description': f'{diagnosis.split(" and ")[0]} typically requires extended care',
-            'impact': impact,
-            'impact_days': days
-        })
-    
-    # Insurance/Payment factors (social determinant)
-    payment = input_data.get('Payment Typology 1', '')
-    if payment in ['Self-Pay', 'Unknown']:
-        factors.append({
-            'factor': 'Insurance Coverage',
-            'description': 'Insurance status may affect discharge planning',
-            'impact': 'low',
-            'impact_days': '+0.5-1 day'
-        })
-    elif payment == 'Medicaid':
-        factors.append({
-            'factor': 'Medicaid Coverage',
-            'description': 'May require additional discharge planning resources',
-            'impact': 'low',
-            'impact_days': '+0.5 day'
-        })
-    
-    # Patient disposition planning
-    disposition = input_data.get('Patient Disposition', '')
-    if disposition in ['Skilled Nursing Home', 'Inpatient Rehabilitation Facility']:
-        factors.append({
-            'factor': 'Post-Acute Care Planning',
-            'description': f'Discharge to {disposition} requires coordination',
-            'impact': 'medium',
-            'impact_days': '+1-2 days'
-        })
+        # Floats like 3.0 hash like 3 but are described as "3.0", so build those
+        factor = HIGH_SEVERITY_RISK_FACTORS.get(severity) if type(severity) is int else None
+        factors.append(factor if factor is not None else _high_severity_factor(severity))
+
+    for key, rule in RISK_FACTOR_RULES:
+        factor = rule.get(input_data.get(key))
+        if factor is not None:
+            factors.append(factor)
     
     # If no specific risk factors, note routine case
     if len(factors) == 0:
-        factors.append({
-            'factor': 'Routine Admission',
-            'description': 'No major clinical complexity indicators identified',
-            'impact': 'none',
-            'impact_days': 'Standard LOS expected'
-        })
+        factors.append(ROUTINE_RISK_FACTOR)
     
     return factors
 
+# ============================================
+# BACKGROUND WORKERS
+# ============================================
+
+class BackgroundWorker(ABC):
+    """
+    Base for helpers that own a daemon thread running self._run()
+    
+    The thread is started lazily on first use, so every gunicorn worker
+    forked from the preloaded master starts its own (threads do not
+    survive a fork).
+    """
+
+    thread_name = 'background-worker'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_worker(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._on_start()
+                threading.Thread(target=self._run, name=self.thread_name, daemon=True).start()
+                self._pid = os.getpid()
+
+    def _on_start(self):
+        """Hook run in the calling thread just before the worker starts"""
+
+    @abstractmethod
+    def _run(self):
+        """Body of the worker thread; runs for the life of the process"""
+
+
+class TimestampCache:
+    """
+    Current local time as an ISO string, re-formatted at most once every
+    interval seconds so most requests reuse the cached string instead of
+    formatting datetime.now()
+    """
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        # (monotonic expiry, ISO string) swapped as one tuple so concurrent
+        # readers never see a string paired with another string's expiry
+        self._cached = (float('-inf'), None)
+
+    def now(self):
+        """Return the cached ISO timestamp (at most interval seconds old)"""
+        expires, value = self._cached
+        current = time.monotonic()
+        if current >= expires:
+            value = datetime.now().isoformat()
+            self._cached = (current + self.interval, value)
+        return value
+
+
+timestamp_cache = TimestampCache()
+
+# ============================================
+# PREDICTION BATCHING
+# ============================================
+
+class PredictionBatcher(BackgroundWorker):
+    """
+    Collects feature rows from concurrent requests and predicts them with a
+    single booster call, which costs far less than one call per row.
+    
+    No row waits for others to arrive: each batch is whatever queued up
+    while the previous booster call ran, so a lone request is predicted
+    immediately and batches only form under concurrent load.
+    """
+
+    thread_name = 'prediction-batcher'
+
+    def __init__(self, booster, max_batch=256):
+        super().__init__()
+        self.booster = booster
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+
+    def predict(self, row):
+        """Queue one feature row and block until its prediction is ready"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((row, future))
+        return future.result()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            rows, futures = zip(*self._next_batch())
+            try:
+                predictions = self.booster.inplace_predict(np.vstack(rows), predict_type='value')
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, prediction in zip(futures, predictions):
+                future.set_result(prediction)
+
+
+prediction_batcher = PredictionBatcher(booster) if booster is not None else None
+
+# ============================================
+# REQUEST VALIDATION
+# ============================================
+
+# Required /api/predict fields and the JSON type each value must have
+PREDICT_REQUEST_SCHEMA = {
+    'Hospital County': str,
+    'Facility Name': str,
+    'Age Group': str,
+    'Gender': str,
+    'Race': str,
+    'Ethnicity': str,
+    'Type of Admission': str,
+    'Patient Disposition': str,
+    'APR MDC Description': str,
+    'APR Severity of Illness Code': int,
+    'APR Medical Surgical Description': str,
+    'Payment Typology 1': str,
+    'Emergency Department Indicator': str
+}
+
+
+def validate_predict_request(data):
+    """
+    Check a prediction payload against PREDICT_REQUEST_SCHEMA
+    
+    Returns:
+        Tuple of (missing fields, fields with a wrong type or unknown value)
+    """
+    missing = []
+    invalid = []
+    for field, expected_type in PREDICT_REQUEST_SCHEMA.items():
+        value = data.get(field, '')
+        if value == '':
+            missing.append(field)
+        elif not isinstance(value, expected_type) or isinstance(value, bool):
+            invalid.append(field)
+
+    # The MDC description is mapped to its code, so it must be a known one
+    if 'APR MDC Description' not in missing + invalid and data['APR MDC Description'] not in mdc_code_mapping:
+        invalid.append('APR MDC Description')
+    return missing, invalid
+
 # ============================================
 # PREDICTION ENDPOINT
 # ============================================
@@ -372,64 +668,63 @@ def predict():
     """
     
     if not MODEL_LOADED:
-        return jsonify({
+        return ojsonify({
             'error': 'Model not loaded',
             'message': 'Server configuration error. Please contact administrator.'
         }), 500
     
     try:
         # Get input data
-        data = request.json
-        logger.info(f"Received prediction request: {data.get('hospital_name', 'Unknown')}")
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return ojsonify({'error': 'Request body must be a JSON object'}), 400
+        logger.debug("Received prediction request: %s", data.get('hospital_name', 'Unknown'))
         
         # Validate required fields
-        required_fields = [
-            'Hospital County','Facility Name','Age Group', 'Gender', 'Race', 'Ethnicity',
-            'Type of Admission', 'Patient Disposition',
-            'APR MDC Description', 'APR Severity of Illness Code',
-            'APR Medical Surgical Description', 'Payment Typology 1',
-            'Emergency Department Indicator'
-        ]
-        
-        missing = [f for f in required_fields if f not in data or data[f] == '']
+        missing, invalid = validate_predict_request(data)
         if missing:
-            logger.warning(f"Missing required fields: {missing}")
-            return jsonify({
+            logger.warning("Missing required fields: %s", missing)
+            return ojsonify({
                 'error': 'Missing required fields',
                 'missing_fields': missing
             }), 400
+        if invalid:
+            logger.warning("Invalid fields: %s", invalid)
+            return ojsonify({
+                'error': 'Invalid field values',
+                'invalid_fields': invalid
+            }), 400
         
-        # Step 1: Create initial DataFrame (13 columns)
-        df_input = prepare_input_dataframe(data)
+        # Step 1: Encode the 13 input columns into the model's feature vector
+        row = encode_model_input(data)
         
         # Step 2: Make prediction
         #predicted_los = model.predict(df_encoded)[0]
-        predicted_los = xgb_hospital_pipeline.predict(df_input)
-        predicted_los_ = predicted_los[0].astype(float)
+        predicted_los = float(prediction_batcher.predict(row))
         
-        logger.info(f"Prediction: {predicted_los_.round(2)} days")
+        logger.debug("Prediction: %.2f days", predicted_los)
         
         # Step 4: Calculate confidence interval
         # If your model supports prediction intervals (e.g., Quantile Regression)
         # use that. Otherwise, use a simple approach:
-        std_error = predicted_los_ * 0.15  # 15% standard error (adjust based on your model's performance)
-        confidence_low = max(1.0, predicted_los_ - 1.96 * std_error)  # 95% CI
-        confidence_high = predicted_los_ + 1.96 * std_error
+        std_error = predicted_los * 0.15  # 15% standard error (adjust based on your model's performance)
+        confidence_low = max(1.0, predicted_los - 1.96 * std_error)  # 95% CI
+        confidence_high = predicted_los + 1.96 * std_error
         
         # Step 5: Identify risk factors
-        risk_factors = identify_risk_factors(data, predicted_los_)
+        risk_factors = identify_risk_factors(data, predicted_los)
         
         # Step 6: Prepare response
         response = {
-            'predicted_los': predicted_los_.round(2),
+            'predicted_los': round(predicted_los, 2),
             'confidence_interval': [
-                confidence_low.round(1).astype(float),
-                confidence_high.round(1).astype(float)
+                round(confidence_low, 1),
+                round(confidence_high, 1)
             ],
             'risk_factors': risk_factors,
             'metadata': {
                 'model_version': '1.0.0',
-                'prediction_timestamp': datetime.now().isoformat(),
+                'prediction_timestamp': timestamp_cache.now(),
                 'hospital_id': data.get('hospital_id'),
                 'hospital_name': data.get('hospital_name'),
                 'input_features': 13,
@@ -439,14 +734,13 @@ def predict():
         
         # Log prediction for monitoring
         log_prediction(data, predicted_los)
-        logger.info(f"predicted value right now")
         
-        return jsonify(response)
+        return ojsonify(response)
     
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
         logger.error(traceback.format_exc())
-        return jsonify({
+        return ojsonify({
             'error': 'Prediction failed',
             'message': str(e),
             'details': traceback.format_exc() if app.debug else None
@@ -459,13 +753,13 @@ def debug():
         expected_features = model.get_booster().feature_names
         
         
-        return jsonify({
+        return ojsonify({
             'expected_features': expected_features,
             'num_features': len(expected_features),
             
         })
     except Exception as e:
-        return jsonify({'error': str(e)})
+        return ojsonify({'error': str(e)})
 
 # ============================================
 # HELPER ENDPOINTS
@@ -475,12 +769,12 @@ def debug():
 def health_check():
     """Check if API and model are ready"""
     
-    return jsonify({
+    return ojsonify({
         'status': 'healthy' if MODEL_LOADED else 'degraded',
         'model_loaded': MODEL_LOADED,
         'expected_features': len(column_names) if column_names else None,
         'version': '1.0.0',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': timestamp_cache.now()
     })
 
 @app.route('/api/model-info', methods=['GET'])
@@ -488,9 +782,9 @@ def model_info():
     """Return information about the model"""
     
     if not MODEL_LOADED:
-        return jsonify({'error': 'Model not loaded'}), 500
+        return ojsonify({'error': 'Model not loaded'}), 500
     
-    return jsonify({
+    return ojsonify({
         'input_features': 13,
         'encoded_features': len(column_names),
         'model_type': type(model).__name__,
@@ -518,43 +812,80 @@ def feature_info():
         # Get non-zero features (more interpretable)
         non_zero_features = df_encoded.loc[0, df_encoded.loc[0] != 0].to_dict()
         
-        return jsonify({
+        # Categorical values with no one-hot column encode as all zeros
+        unknown_categories = [
+            col for col in CATEGORICAL_COLUMNS
+            if (col, df_input.at[0, col]) not in ONEHOT_INDEX
+        ]
+        
+        return ojsonify({
             'input_shape': df_input.shape,
             'encoded_shape': df_encoded.shape,
             'non_zero_features': len(non_zero_features),
             'sample_features': dict(list(non_zero_features.items())[:20]),  # First 20
-            'all_features_present': df_encoded.shape[1] == len(column_names)
+            'all_features_present': not unknown_categories,
+            'unknown_categories': unknown_categories
         })
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 # ============================================
 # LOGGING AND MONITORING
 # ============================================
 
+class PredictionLogQueue(BackgroundWorker):
+    """
+    Writes prediction log entries from a daemon thread so logging I/O stays
+    off the request path. Entries are dropped when the queue is full rather
+    than blocking a request.
+    """
+
+    thread_name = 'prediction-log'
+
+    def __init__(self, maxsize=1024):
+        super().__init__()
+        self._queue = queue.Queue(maxsize)
+
+    def put(self, log_entry):
+        """Queue a log entry without blocking"""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(log_entry)
+        except queue.Full:
+            pass
+
+    def _run(self):
+        while True:
+            log_entry = self._queue.get()
+            logger.info("PREDICTION_LOG: %s", log_entry)
+
+            # TODO: In production, save to database
+            # db.predictions.insert_one(log_entry)
+
+
+prediction_log_queue = PredictionLogQueue()
+
+
 def log_prediction(input_data, prediction):
     """
     Log predictions for monitoring and model improvement
-    In production, save to database
+    The entry is written by prediction_log_queue's background thread
     """
     
     log_entry = {
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': timestamp_cache.now(),
         'hospital_id': input_data.get('hospital_id'),
         'hospital_name': input_data.get('hospital_name'),
         'county': input_data.get('Hospital County'),
-        'predicted_los': prediction.round(2),
+        'predicted_los': round(prediction, 2),
         'severity': input_data.get('APR Severity of Illness Code'),
         'age_group': input_data.get('Age Group'),
         'diagnosis': input_data.get('APR MDC Description'),
         'admission_type': input_data.get('Type of Admission')
     }
     
-    logger.info(f"PREDICTION_LOG: {log_entry}")
-    
-    # TODO: In production, save to database
-    # db.predictions.insert_one(log_entry)
+    prediction_log_queue.put(log_entry)
 
 
 
@@ -564,12 +895,12 @@ def log_prediction(input_data, prediction):
 
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({'error': 'Endpoint not found'}), 404
+    return ojsonify({'error': 'Endpoint not found'}), 404
 
 @app.errorhandler(500)
 def internal_error(error):
     logger.error(f"Internal server error: {error}")
-    return jsonify({'error': 'Internal server error'}), 500
+    return ojsonify({'error': 'Internal server error'}), 500
 
 
 # ============================================
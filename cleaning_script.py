@@ -2,7 +2,7 @@ import pandas as pd
 import numpy as np
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.preprocessing import OneHotEncoder, FunctionTransformer
 
 
 drop_list = ["Hospital Service Area","Operating Certificate Number","Permanent Facility Id","Zip Code - 3 digits",
@@ -15,6 +15,11 @@ cat_cols = ["Hospital County","Facility Name","Age Group","Gender","Race","Ethni
 num_cols = ["APR MDC Code","APR Severity of Illness Code"]
 
 
+def to_float32(X):
+    """Cast passthrough numeric columns to float32 (module level so it pickles)"""
+    return np.asarray(X).astype(np.float32, copy=False)
+
+
 ## load pipeline 
 class HospitalDataCleaner(BaseEstimator, TransformerMixin):
     """
@@ -60,11 +65,11 @@ class HospitalDataCleaner(BaseEstimator, TransformerMixin):
         if self.drop_list:
             df = df.drop(columns=self.drop_list, errors="ignore")
         
-        # Build ColumnTransformer
+        # Build ColumnTransformer (float32 output, the precision XGBoost uses)
         self.encoder = ColumnTransformer(
             transformers=[
-                ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), self.cat_cols),
-                ("num", "passthrough", self.num_cols)
+                ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False, dtype=np.float32), self.cat_cols),
+                ("num", FunctionTransformer(to_float32, feature_names_out="one-to-one"), self.num_cols)
             ]
         )
         
@@ -80,27 +85,18 @@ class HospitalDataCleaner(BaseEstimator, TransformerMixin):
     
 
     def transform(self, X):
-        df = X.copy()
-        
-        # Convert LOS if present
-        if "Length of Stay" in df.columns:
-            df["Length of Stay"] = df["Length of Stay"].replace("120 +", 120).astype(int)
-        
+        # Build a thin frame holding only the columns the encoder uses, so X
+        # is never copied and nothing has to be dropped afterwards
+        columns = {col: X[col].to_numpy() for col in self.cat_cols + self.num_cols if col in X}
+
         # Apply mappings (handle unseen codes)
-        df["LOS_per_MDC"] = df["APR MDC Code"].map(self.mdc_mapping).fillna(
-            self.mdc_mapping.median() if self.mdc_mapping is not None else 0
-        )
-        df["LOS_per_severity"] = df["APR Severity of Illness Code"].map(self.severity_mapping).fillna(
-            self.severity_mapping.median() if self.severity_mapping is not None else 0
-        )
-        
+        columns["LOS_per_MDC"] = self._target_encode(X["APR MDC Code"], self.mdc_mapping)
+        columns["LOS_per_severity"] = self._target_encode(X["APR Severity of Illness Code"], self.severity_mapping)
+        df = pd.DataFrame(columns, index=X.index)
 
-        # Drop irrelevant columns
-        if self.drop_list:
-            df = df.drop(columns=self.drop_list, errors="ignore")
-        print(df.info())
-        # Transform using trained encoder
-        X_encoded = self.encoder.transform(df)
+        # Transform using trained encoder (encoders fitted before the float32
+        # change still emit float64)
+        X_encoded = self.encoder.transform(df).astype(np.float32, copy=False)
         
         # Return as DataFrame if requested
         if self.return_dataframe:
@@ -108,6 +104,15 @@ class HospitalDataCleaner(BaseEstimator, TransformerMixin):
         
         return X_encoded
 
+    @staticmethod
+    def _target_encode(codes, mapping):
+        """Look up each code's median LOS, using the mapping's median for unseen codes"""
+        if mapping is None:
+            return np.zeros(len(codes))
+        lookup = mapping.to_dict()
+        default = mapping.median()
+        return np.fromiter((lookup.get(code, default) for code in codes), dtype=np.float64, count=len(codes))
+
 
 
 mdc_code_mapping = {
@@ -0,0 +1,20 @@
+"""
+Gunicorn configuration for the Hospital LOS Prediction API
+Usage: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+
+# Set HOST=127.0.0.1 when running behind nginx (see nginx.conf) so clients
+# cannot reach gunicorn directly and bypass it
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 5000)}"
+workers = 4
+# Threads give each worker concurrent requests for the PredictionBatcher in
+# app.py to group into one booster call
+threads = 8
+timeout = 120  # ML inference can be slow on a cold worker
+
+# Import app.py (and load every model pickle) once in the master before
+# forking, so workers share the loaded pages copy-on-write instead of each
+# unpickling its own copy
+preload_app = True